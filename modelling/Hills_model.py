@@ -1,6 +1,23 @@
 import numpy as np
 import pints
 
+import modelling
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _hill_kernel(drug_conc, Hills_coef, IC50):
+    return IC50 / (np.power(drug_conc, Hills_coef) + IC50)
+
+
+if numba is not None:
+    # Compile the Hill equation if numba is installed, caching the compiled
+    # function on disk
+    _hill_kernel = numba.njit(cache=True)(_hill_kernel)
+
 
 class HillsModel(pints.ForwardModel):
     """
@@ -24,14 +41,49 @@ class HillsModel(pints.ForwardModel):
         # if not any([i == 0 for i in drug_conc]):
         #     raise ValueError("Must not have zero drug concentration.")
 
-        Hills_coef = params[0]
-        IC50 = params[1]
+        Hills_coef = float(params[0])
+        IC50 = float(params[1])
 
-        response = IC50 / (np.power(drug_conc, Hills_coef) + IC50)
+        if np.ndim(drug_conc) == 0:
+            drug_conc = float(drug_conc)
+        else:
+            drug_conc = np.asarray(drug_conc, dtype=np.float64)
+        response = _hill_kernel(drug_conc, Hills_coef, IC50)
 
         return response
 
 
+class HillsTransformation(pints.Transformation):
+    """
+    Transforms the parameters of :class:`HillsModel`, the Hill's coefficient
+    ``n`` and ``IC50``, to the search space ``(log(n), log10(IC50) / n)``.
+
+    As ``HillsModel`` uses ``IC50 / (C^n + IC50)``, ``IC50^(1/n)`` is the drug
+    concentration at half response. Searching over its logarithm instead of
+    ``IC50`` removes most of the correlation between the two parameters.
+    """
+
+    def elementwise(self):
+        return False
+
+    def jacobian(self, q):
+        n = np.exp(q[0])
+        IC50 = np.power(10, n * q[1])
+        return np.array([
+            [n, 0],
+            [IC50 * np.log(10) * n * q[1], IC50 * np.log(10) * n]])
+
+    def n_parameters(self):
+        return 2
+
+    def to_model(self, q):
+        n = np.exp(q[0])
+        return np.array([n, np.power(10, n * q[1])])
+
+    def to_search(self, p):
+        return np.array([np.log(p[0]), np.log10(p[1]) / p[0]])
+
+
 class HillsModelOpt(object):
 
     def __init__(self, model):
@@ -39,7 +91,8 @@ class HillsModelOpt(object):
 
         self.model = model
 
-    def optimise(self, drug_conc, inhibit_metric, parallel=True):
+    def optimise(self, drug_conc, inhibit_metric, parallel=True, n_starts=1,
+                 seed=None):
 
         if not any([i == 0 for i in drug_conc]):
             raise ValueError("Must have drug concentration = 0")
@@ -62,16 +115,74 @@ class HillsModelOpt(object):
                                             inhibit_metric)
         error_measure = pints.MeanSquaredError(problem)
 
-        transform = pints.LogTransformation(n_parameters=2)
-        initial_parameters = [0.9, IC50_predict]
-        optimiser = pints.OptimisationController(
-            function=error_measure,
-            x0=initial_parameters,
-            method=pints.CMAES,
-            transformation=transform)
-        optimiser.set_parallel(parallel)
-
-        optimiser.set_max_iterations(1000)
+        # Search over the Hill's coefficient and the logarithm of the drug
+        # concentration at half response, starting from the measured one
+        transform = HillsTransformation()
+        initial_parameters = [0.9, np.power(IC50_predict, 0.9)]
+
+        if n_starts == 1:
+            return _optimise_start(
+                initial_parameters, error_measure, transform, parallel,
+                seed=seed)
+
+        # Restart the optimisation from random points around the initial
+        # guess, with the Hill's coefficient within [0.5, 2] and the drug
+        # concentration at half response within a decade of the measured one
+        rng = np.random.RandomState(seed)
+        starts = [[None] + initial_parameters]
+        for _ in range(1, n_starts):
+            Hills_coef = np.exp(rng.uniform(np.log(0.5), np.log(2)))
+            IC50 = IC50_predict * np.power(10, rng.uniform(-1, 1))
+            starts.append([None, Hills_coef, np.power(IC50, Hills_coef)])
+        for start in starts:
+            start[0] = rng.randint(2**31 - 1)
+
+        # Run the restarts in parallel, each with a sequential optimiser
+        if parallel:
+            evaluator = modelling.ForkEvaluator(
+                _optimise_seeded, args=(error_measure, transform))
+        else:
+            evaluator = pints.SequentialEvaluator(
+                _optimise_seeded, args=(error_measure, transform))
+        results = evaluator.evaluate(starts)
+
+        return min(results, key=lambda result: result[1])
+
+
+def _optimise_start(x0, error_measure, transform, parallel, seed=None,
+                    log_to_screen=True):
+    """
+    Fits the Hill curve with CMA-ES, starting from ``x0``. If a ``seed`` is
+    given, the optimiser is seeded with it and the global random state of
+    NumPy, which CMA-ES samples from, is restored afterwards.
+    """
+    optimiser = pints.OptimisationController(
+        function=error_measure,
+        x0=x0,
+        method=pints.CMAES,
+        transformation=transform)
+    optimiser.set_parallel(parallel)
+    optimiser.set_log_to_screen(log_to_screen)
+
+    optimiser.set_max_iterations(1000)
+    if seed is None:
+        return optimiser.run()
+
+    random_state = np.random.get_state()
+    np.random.seed(seed)
+    try:
         param_best, score_best = optimiser.run()
+    finally:
+        np.random.set_state(random_state)
+
+    return param_best, score_best
 
-        return param_best, score_best
+
+def _optimise_seeded(start, error_measure, transform):
+    """
+    Fits the Hill curve from ``start = [seed, x0...]``, for the restarts of
+    :meth:`HillsModelOpt.optimise`.
+    """
+    return _optimise_start(
+        start[1:], error_measure, transform, False, seed=start[0],
+        log_to_screen=False)
@@ -1,4 +1,7 @@
-from .binding_kinetics import BindingKinetics
+from .binding_kinetics import (
+    BindingKinetics,
+    ForkEvaluator
+)
 
 from .lib_binding_kinetics import (
     BindingParameters,
@@ -16,7 +19,8 @@ from .dataset_library import (
 
 from .Hills_model import (
     HillsModel,
-    HillsModelOpt
+    HillsModelOpt,
+    HillsTransformation
 )
 
 from .model_comparison import (
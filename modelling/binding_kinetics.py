@@ -6,11 +6,205 @@
 # 2017 Feb;10(2):e004628. doi: 10.1161/CIRCEP.116.004628.
 
 
+import hashlib
+import multiprocessing
 import myokit
 import numpy as np
+import os
+import pints
+import sys
+import tempfile
 
 import modelling
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Directory where compiled simulations are stored, so that a model is only
+# compiled once across runs. It can be set with the MYOKIT_COMPILER_CACHE
+# environment variable
+SIM_CACHE_DIR = os.environ.get('MYOKIT_COMPILER_CACHE', os.path.join(
+    os.path.expanduser('~'), '.cache', 'binding-mechanism', 'myokit'))
+
+
+def cached_simulation(model):
+    """
+    Returns a :class:`myokit.Simulation` of ``model`` without protocol. The
+    compiled simulation is stored in ``SIM_CACHE_DIR``, keyed by a hash of the
+    model code, and loaded from there when the same model is simulated again.
+    If the directory is not writable, the simulation is compiled without
+    being stored.
+    """
+    # Storing compiled simulations requires a recent version of myokit
+    if not hasattr(myokit.Simulation, 'from_path'):
+        return myokit.Simulation(model)
+
+    # Compiled simulations depend on the myokit and python versions
+    key = hashlib.blake2b(
+        (myokit.__version__ + sys.version + model.code()).encode())
+    path = os.path.join(SIM_CACHE_DIR, key.hexdigest() + '.zip')
+    if os.path.isfile(path):
+        try:
+            return myokit.Simulation.from_path(path)
+        except Exception:
+            # A corrupted stored simulation is replaced by a new compilation
+            pass
+
+    # Store the compiled simulation under a temporary name and then move it
+    # into place, so that other processes never load a partly written file
+    try:
+        os.makedirs(SIM_CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix='.zip', dir=SIM_CACHE_DIR)
+        os.close(fd)
+    except OSError:
+        # The cache directory is not writable, so the simulation is compiled
+        # without storing it
+        return myokit.Simulation(model)
+
+    try:
+        sim = myokit.Simulation(model, path=temp_path)
+        os.replace(temp_path, path)
+    except OSError:
+        sim = myokit.Simulation(model)
+    finally:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+
+    return sim
+
+
+# Function and arguments evaluated by the workers of ForkEvaluator. They are
+# set before the workers are forked, so that the workers inherit them rather
+# than receive them pickled
+_fork_task = None
+
+
+def _fork_available():
+    # Forking is unavailable on Windows and unsafe on macOS
+    return sys.platform != 'darwin' and \
+        'fork' in multiprocessing.get_all_start_methods()
+
+
+def _evaluate_forked(x):
+    function, args = _fork_task
+    return function(x, *args)
+
+
+class ForkEvaluator(pints.Evaluator):
+    """
+    Evaluates a function for a sequence of positions in parallel, as
+    :class:`pints.ParallelEvaluator`, with worker processes forked from the
+    current process. The workers share the models and compiled simulations
+    created before the evaluation, instead of loading and compiling their
+    own, and the function does not need to be picklable.
+
+    Only the pool of workers uses the fork start method, so the start method
+    of the rest of the program is unaffected. Where forking is unavailable or
+    unsafe (Windows and macOS), the positions are evaluated sequentially, as
+    scripts that run at import time cannot be re-imported by spawned workers.
+    """
+
+    def __init__(self, function, n_workers=None, args=None):
+        super(ForkEvaluator, self).__init__(function, args)
+
+        self._n_workers = n_workers
+
+    def _evaluate(self, positions):
+        if not _fork_available():
+            return [self._function(x, *self._args) for x in positions]
+
+        global _fork_task
+        _fork_task = (self._function, self._args)
+        try:
+            context = multiprocessing.get_context('fork')
+            with context.Pool(self._n_workers) as pool:
+                return pool.map(_evaluate_forked, positions, chunksize=1)
+        finally:
+            _fork_task = None
+
+    def evaluate_unordered(self, positions):
+        """
+        Evaluates the function for every value in ``positions``, as
+        :meth:`evaluate`, but yields each evaluation as soon as it is done,
+        in the order in which they finish.
+        """
+        if not _fork_available():
+            for x in positions:
+                yield self._function(x, *self._args)
+            return
+
+        global _fork_task
+        _fork_task = (self._function, self._args)
+        try:
+            context = multiprocessing.get_context('fork')
+            with context.Pool(self._n_workers) as pool:
+                for result in pool.imap_unordered(_evaluate_forked,
+                                                  positions):
+                    yield result
+        finally:
+            _fork_task = None
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _apd90_kernel(signal, offset, timestep):
+        """
+        Compiled version of :meth:`BindingKinetics.APD90`.
+        """
+        signal_min = signal[0]
+        signal_max = signal[0]
+        for v in signal:
+            if v < signal_min:
+                signal_min = v
+            elif v > signal_max:
+                signal_max = v
+        APD90_v = signal_min + 0.1 * (signal_max - signal_min)
+
+        index = 0
+        closest = abs(signal[0] - APD90_v)
+        for i in range(1, len(signal)):
+            distance = abs(signal[i] - APD90_v)
+            if distance < closest:
+                closest = distance
+                index = i
+
+        APD90 = index * timestep - offset
+        if APD90 < 1:
+            APD90 = len(signal) * timestep
+
+        return APD90
+
+    @numba.njit(cache=True)
+    def _apd90_batch_kernel(signals, offset, timestep):
+        """
+        Compiled version of :meth:`BindingKinetics.APD90_batch`.
+        """
+        APD90 = np.empty(signals.shape[0])
+        for i in range(signals.shape[0]):
+            APD90[i] = _apd90_kernel(signals[i], offset, timestep)
+
+        return APD90
+
+    # Only used in the parent process, where the thread pool is started once
+    # for many pulses (numba's thread pool is not safe to use across forks)
+    @numba.njit(cache=True, parallel=True)
+    def _apd90_parallel_kernel(signals, offset, timestep):
+        """
+        Compiled version of :meth:`BindingKinetics.APD90_batch`, computing
+        the pulses in parallel.
+        """
+        APD90 = np.empty(signals.shape[0])
+        for i in numba.prange(signals.shape[0]):
+            APD90[i] = _apd90_kernel(signals[i], offset, timestep)
+
+        return APD90
+else:
+    _apd90_kernel = None
+    _apd90_batch_kernel = None
+    _apd90_parallel_kernel = None
+
 
 class BindingKinetics(object):
     """
@@ -19,14 +213,74 @@ class BindingKinetics(object):
     (ref. Table 2)
     """
 
+    # Conductances of the ion channels other than hERG, as scaled in the
+    # multi-ion simulations
+    ion_conductances = {
+        'INaL': 'inal.gNaL',
+        'ICaL': 'ical.base',
+        'INa': 'ina.gNa',
+        'Ito': 'ito.gto',
+        'IK1': 'ik1.gK1',
+        'IKs': 'iks.gKs', }
+
+    # Names of the hERG-binding constants in the model
+    binding_constants = {
+        'Vhalf': 'Vhalf',
+        'Kmax': 'Kmax',
+        'Ku': 'Ku',
+        'N': 'n',
+        'EC50': 'halfmax',
+        'Kt': 'Kt',
+        'gKr': 'gKr', }
+
+    # Solver tolerances (abs_tol, rel_tol) used by the simulation methods
+    # when no tolerances are given
+    tolerance_profiles = {
+        'tight': (1e-7, 1e-8),
+        'default': (1e-6, 1e-4),
+        'loose': (1e-5, 1e-3), }
+
     def __init__(self, model, protocol=None, current_head=None):
         super(BindingKinetics, self).__init__()
 
         self.model = model
-        self.protocol = protocol
-        self.sim = myokit.Simulation(self.model, self.protocol)
+        self._protocol = protocol
+
+        # The simulation is compiled once and reused by all simulation
+        # methods
+        self.sim = cached_simulation(self.model)
+        self.sim.set_protocol(self.protocol)
         # self.sim.set_default_state(self.sim.state())
         self.initial_state = self.sim.state()
+        self._D_index = [s.qname() for s in self.model.states()].index(
+            'ikr.D')
+
+        # Library of drug parameters and the conductances of the other ion
+        # channels, looked up once
+        self._param_lib = modelling.BindingParameters()
+        self._ion_qnames = {
+            current: self.model.get(name).qname()
+            for current, name in self.ion_conductances.items()
+            if self.model.has_variable(name)}
+        self._base_conductances = {
+            current: self.model.get(name).eval()
+            for current, name in self._ion_qnames.items()}
+
+        # hERG states shown in state occupancy plots
+        self._ikr_plot_states = [
+            s for s in self.model.states()
+            if str(s.parent()) == 'ikr' and s.name() != 'D']
+        self._ikr_plot_labels = [s.name() for s in self._ikr_plot_states]
+
+        # Default solver tolerances, see tolerance_profiles
+        self.tolerance_profile = 'default'
+
+        # Simulation with the AP clamp protocol, created on first use
+        self._APclamp_sim = None
+
+        # Constants last set on each simulation, so that only constants that
+        # changed are set again
+        self._last_constants = {}
 
         if current_head is None:
             self.current_head = next(iter(self.model.states())).parent()
@@ -42,154 +296,306 @@ class BindingKinetics(object):
             "Kt": self.model.get(self.current_head.var('Kt')).eval(),
             "gKr": self.model.get(self.current_head.var('gKr')).eval(), }
 
-    def drug_simulation(self, drug, drug_conc, repeats,
-                        timestep=0.1, save_signal=1, log_var=None,
-                        set_state=None, abs_tol=1e-6, rel_tol=1e-4,
-                        protocol_period=None):
-        param_lib = modelling.BindingParameters()
-
-        Vhalf = param_lib.binding_parameters[drug]['Vhalf']
-        Kmax = param_lib.binding_parameters[drug]['Kmax']
-        Ku = param_lib.binding_parameters[drug]['Ku']
-        N = param_lib.binding_parameters[drug]['N']
-        EC50 = param_lib.binding_parameters[drug]['EC50']
-
-        if protocol_period is None:
-            t_max = self.protocol.characteristic_time()
+    @property
+    def current_head(self):
+        return self._current_head
+
+    @current_head.setter
+    def current_head(self, current_head):
+        self._current_head = current_head
+        # Constants are set by qualified name, which the simulation looks up
+        # directly
+        self._const_qnames = {
+            key: current_head.var(name).qname()
+            for key, name in self.binding_constants.items()}
+
+    @property
+    def protocol(self):
+        return self._protocol
+
+    @protocol.setter
+    def protocol(self, protocol):
+        self._protocol = protocol
+        self.sim.set_protocol(protocol)
+
+    def _reset_simulation(self, sim, abs_tol, rel_tol, drug_conc=None,
+                          set_state=None):
+        """
+        Resets a cached simulation to the initial state of the model, with
+        the drug concentration ``drug_conc`` if given. Tolerances that are
+        ``None`` are taken from the current tolerance profile.
+        """
+        default_abs_tol, default_rel_tol = \
+            self.tolerance_profiles[self.tolerance_profile]
+        if abs_tol is None:
+            abs_tol = default_abs_tol
+        if rel_tol is None:
+            rel_tol = default_rel_tol
+
+        if drug_conc is not None:
+            self.initial_state[self._D_index] = drug_conc
+
+        sim.set_default_state(self.initial_state)
+        sim.reset()
+        sim.set_tolerance(abs_tol=abs_tol, rel_tol=rel_tol)
+        if set_state:
+            if drug_conc is not None:
+                set_state['ikr.D'][-1] = drug_conc
+            sim.set_state(set_state)
+
+    def _set_constants(self, sim, constants):
+        """
+        Sets the constants in ``constants``, a dictionary mapping variable
+        names to values, skipping the ones that have not changed since they
+        were last set on ``sim``.
+        """
+        applied = self._last_constants.setdefault(sim, {})
+        for name, value in constants.items():
+            if applied.get(name) != value:
+                sim.set_constant(name, value)
+                applied[name] = value
+
+    def _apply_binding_constants(self, params, sim=None):
+        """
+        Sets the hERG-binding constants, given as a dictionary with keys
+        'Vhalf', 'Kmax', 'Ku', 'N', 'EC50', 'Kt' and 'gKr'.
+        """
+        sim = self.sim if sim is None else sim
+        self._set_constants(sim, {
+            name: params[key] for key, name in self._const_qnames.items()})
+
+    def _apply_ion_scales(self, ion_scale=None, sim=None):
+        """
+        Scales the conductances of ion channels other than hERG. If
+        ``ion_scale`` is ``None``, conductances scaled in a previous
+        simulation are restored to their original values.
+        """
+        sim = self.sim if sim is None else sim
+        applied = self._last_constants.setdefault(sim, {})
+
+        constants = {}
+        for current, name in self._ion_qnames.items():
+            if ion_scale is not None:
+                scale = ion_scale[current]
+            elif name in applied:
+                scale = 1
+            else:
+                continue
+            constants[name] = self._base_conductances[current] * scale
+        self._set_constants(sim, constants)
+
+    def _log_to_numpy(self, log, t_max, save_signal,
+                      output_dtype=np.float64):
+        """
+        Returns the simulated ``log`` with NumPy arrays, split into
+        ``save_signal`` pulses of duration ``t_max`` if more than one pulse
+        is saved.
+
+        With an ``output_dtype`` other than ``np.float64``, the logged
+        variables other than time are cast after the simulation, e.g. to
+        ``np.float32`` for logs that are only plotted or used to compute
+        APD90s and peak currents. The solver tolerances are unaffected.
+        """
+        # Folding the simulated log directly copies each pulse once, rather
+        # than folding a NumPy view of the log
+        if save_signal > 1:
+            d2 = log.fold(t_max).npview()
         else:
-            t_max = protocol_period
-        # print(t_max)
+            d2 = log.npview()
 
-        concentration = self.model.get('ikr.D')
-        concentration.set_state_value(drug_conc)
+        if output_dtype is not np.float64:
+            time_key = d2.time_key()
+            for key in list(d2.keys()):
+                if key != time_key:
+                    d2[key] = d2[key].astype(output_dtype, copy=False)
 
-        self.sim = myokit.Simulation(self.model, self.protocol)
-        self.sim.reset()
-        self.sim.set_tolerance(abs_tol=abs_tol, rel_tol=rel_tol)
-        if set_state:
-            set_state['ikr.D'][-1] = drug_conc
-            self.sim.set_state(set_state)
-        # self.sim.set_state(self.initial_state)
+        return d2
 
-        self.sim.set_constant(self.current_head.var('Vhalf'), Vhalf)
-        self.sim.set_constant(self.current_head.var('Kmax'), Kmax)
-        self.sim.set_constant(self.current_head.var('Ku'), Ku)
-        self.sim.set_constant(self.current_head.var('n'), N)
-        self.sim.set_constant(self.current_head.var('halfmax'), EC50)
-        self.sim.set_constant(self.current_head.var('Kt'), 3.5e-5)
-        self.sim.set_constant(self.current_head.var('gKr'),
-                              self.original_constants["gKr"])
+    def _drug_constants(self, drug):
+        params = self._param_lib.binding_parameters[drug]
+
+        return {
+            'Vhalf': params['Vhalf'],
+            'Kmax': params['Kmax'],
+            'Ku': params['Ku'],
+            'N': params['N'],
+            'EC50': params['EC50'],
+            'Kt': 3.5e-5,
+            'gKr': self.original_constants["gKr"], }
+
+    def _model_constants(self, conductance):
+        # The hERG-binding constants of the model, with hERG conductance
+        # ``conductance``
+        return {
+            'Vhalf': self.original_constants["Vhalf"],
+            'Kmax': self.original_constants["Kmax"],
+            'Ku': self.original_constants["Ku"],
+            'N': self.original_constants["n"],
+            'EC50': self.original_constants["EC50"],
+            'Kt': self.original_constants["Kt"],
+            'gKr': conductance, }
+
+    def _run(self, const_overrides, repeats, save_signal, timestep, log_var,
+             abs_tol, rel_tol, t_max, drug_conc=None, set_state=None,
+             ion_scale=None, output_dtype=np.float64):
+        """
+        Simulates ``repeats`` pulses of duration ``t_max`` with the binding
+        constants ``const_overrides`` and the conductances of the other ion
+        channels scaled by ``ion_scale``, and returns the log of the last
+        ``save_signal`` pulses.
+        """
+        self._reset_simulation(self.sim, abs_tol, rel_tol,
+                               drug_conc=drug_conc, set_state=set_state)
+
+        self._apply_binding_constants(const_overrides)
+        self._apply_ion_scales(ion_scale)
 
         self.sim.pre(t_max * (repeats - save_signal))
         log = self.sim.run(t_max * save_signal, log=log_var,
                            log_interval=timestep)
-        d2 = log.npview()
-        if save_signal > 1:
-            d2 = d2.fold(t_max)
 
-        # self.sim.reset()
+        return self._log_to_numpy(log, t_max, save_signal, output_dtype)
 
-        return d2
+    def drug_simulation(self, drug, drug_conc, repeats,
+                        timestep=0.1, save_signal=1, log_var=None,
+                        set_state=None, abs_tol=None, rel_tol=None,
+                        protocol_period=None, output_dtype=np.float64):
+        if protocol_period is None:
+            t_max = self.protocol.characteristic_time()
+        else:
+            t_max = protocol_period
 
-    def custom_simulation(self, param_values, drug_conc, repeats,
-                          timestep=0.1, save_signal=1, log_var=None,
-                          abs_tol=1e-6, rel_tol=1e-4):
+        return self._run(self._drug_constants(drug), repeats, save_signal,
+                         timestep, log_var, abs_tol, rel_tol, t_max,
+                         drug_conc=drug_conc, set_state=set_state,
+                         output_dtype=output_dtype)
+
+    def drug_conc_sweep(self, drug, drug_conc, repeats, warmup_repeats,
+                        timestep=0.1, save_signal=1, log_var=None,
+                        abs_tol=None, rel_tol=None,
+                        output_dtype=np.float64):
+        """
+        Simulates ``drug`` at each of the concentrations in ``drug_conc`` and
+        returns the list of logs.
+
+        The drug-free model is paced for ``warmup_repeats`` pulses once, and
+        every concentration starts from that state, so only
+        ``repeats - warmup_repeats`` pulses are simulated per concentration.
+        The results agree with :meth:`drug_simulation` when the drug binding
+        reaches steady state within those pulses, e.g. when the APD90 (or
+        peak current) of the last two saved pulses differ by less than the
+        logging time step. Slowly trapping drugs need a smaller
+        ``warmup_repeats``.
+        """
+        if warmup_repeats + save_signal > repeats:
+            raise ValueError(
+                'The number of warm-up pulses and saved pulses must not '
+                'exceed the number of repeats.')
 
         t_max = self.protocol.characteristic_time()
 
-        concentration = self.model.get('ikr.D')
-        concentration.set_state_value(drug_conc)
-
-        self.sim = myokit.Simulation(self.model, self.protocol)
-        self.sim.reset()
-        self.sim.set_tolerance(abs_tol=abs_tol, rel_tol=rel_tol)
-
-        self.sim.set_constant(self.current_head.var('Vhalf'),
-                              param_values['Vhalf'].values[0])
-        self.sim.set_constant(self.current_head.var('Kmax'),
-                              param_values['Kmax'].values[0])
-        self.sim.set_constant(self.current_head.var('Ku'),
-                              param_values['Ku'].values[0])
-        self.sim.set_constant(self.current_head.var('n'),
-                              param_values['N'].values[0])
-        self.sim.set_constant(self.current_head.var('halfmax'),
-                              param_values['EC50'].values[0])
-        self.sim.set_constant(self.current_head.var('Kt'), 3.5e-5)
-        self.sim.set_constant(self.current_head.var('gKr'),
-                              self.original_constants["gKr"])
+        # Pace the drug-free model once
+        self._reset_simulation(self.sim, abs_tol, rel_tol, drug_conc=0)
+        self._apply_binding_constants(self._drug_constants(drug))
+        self._apply_ion_scales()
+        self.sim.pre(t_max * warmup_repeats)
+        baseline_state = self.sim.state()
+
+        logs = []
+        for conc in drug_conc:
+            self._reset_simulation(self.sim, abs_tol, rel_tol, drug_conc=conc)
+            state = list(baseline_state)
+            state[self._D_index] = conc
+            self.sim.set_state(state)
+
+            self.sim.pre(t_max * (repeats - warmup_repeats - save_signal))
+            log = self.sim.run(t_max * save_signal, log=log_var,
+                               log_interval=timestep)
+            d2 = self._log_to_numpy(log, t_max, save_signal, output_dtype)
+            logs.append(d2)
+
+        return logs
+
+    def drug_simulation_parallel(self, drug, drug_conc, repeats,
+                                 n_workers=None, **kwargs):
+        """
+        Runs :meth:`drug_simulation` for each of the drug concentrations in
+        ``drug_conc`` in parallel, using :class:`ForkEvaluator`, and returns
+        the list of simulated logs.
+
+        The worker processes are forked, so each worker reuses its own copy
+        of the compiled simulation. Extra keyword arguments are passed to
+        :meth:`drug_simulation`.
+        """
+        evaluator = ForkEvaluator(
+            self._drug_simulation_worker, n_workers=n_workers,
+            args=(drug, repeats, kwargs))
+
+        return evaluator.evaluate(list(drug_conc))
+
+    def _drug_simulation_worker(self, drug_conc, drug, repeats, kwargs):
+        return self.drug_simulation(drug, drug_conc, repeats, **kwargs)
 
-        self.sim.pre(t_max * (repeats - save_signal))
-        log = self.sim.run(t_max * save_signal, log=log_var,
-                           log_interval=timestep)
-        d2 = log.npview()
-        if save_signal > 1:
-            d2 = d2.fold(t_max)
+    def custom_simulation(self, param_values, drug_conc, repeats,
+                          timestep=0.1, save_signal=1, log_var=None,
+                          abs_tol=None, rel_tol=None,
+                          output_dtype=np.float64):
 
-        # self.sim.reset()
+        t_max = self.protocol.characteristic_time()
 
-        return d2
+        return self._run({
+            'Vhalf': param_values['Vhalf'].values[0],
+            'Kmax': param_values['Kmax'].values[0],
+            'Ku': param_values['Ku'].values[0],
+            'N': param_values['N'].values[0],
+            'EC50': param_values['EC50'].values[0],
+            'Kt': 3.5e-5,
+            'gKr': self.original_constants["gKr"], },
+            repeats, save_signal, timestep, log_var, abs_tol, rel_tol, t_max,
+            drug_conc=drug_conc, output_dtype=output_dtype)
 
     def conductance_simulation(self, conductance, repeats,
                                timestep=0.1, save_signal=1, log_var=None,
-                               abs_tol=1e-6, rel_tol=1e-4, set_state=None):
-        self.sim = myokit.Simulation(self.model, self.protocol)
-        self.sim.reset()
-        if set_state:
-            self.sim.set_state(set_state)
-        self.sim.set_tolerance(abs_tol=abs_tol, rel_tol=rel_tol)
-
-        self.sim.set_constant(self.current_head.var('Vhalf'),
-                              self.original_constants["Vhalf"])
-        self.sim.set_constant(self.current_head.var('Kmax'),
-                              self.original_constants["Kmax"])
-        self.sim.set_constant(self.current_head.var('Ku'),
-                              self.original_constants["Ku"])
-        self.sim.set_constant(self.current_head.var('n'),
-                              self.original_constants["n"])
-        self.sim.set_constant(self.current_head.var('halfmax'),
-                              self.original_constants["EC50"])
-        self.sim.set_constant(self.current_head.var('Kt'),
-                              self.original_constants["Kt"])
-        self.sim.set_constant(self.current_head.var('gKr'), conductance)
+                               abs_tol=None, rel_tol=None, set_state=None,
+                               output_dtype=np.float64):
         t_max = self.protocol.characteristic_time()
 
-        self.sim.pre(t_max * (repeats - save_signal))
-        log = self.sim.run(t_max * save_signal, log=log_var,
-                           log_interval=timestep)
-        d2 = log.npview()
-        if save_signal > 1:
-            d2 = d2.fold(t_max)
+        return self._run(self._model_constants(conductance), repeats,
+                         save_signal, timestep, log_var, abs_tol, rel_tol,
+                         t_max, set_state=set_state,
+                         output_dtype=output_dtype)
 
-        # self.sim.reset()
+    def conductance_sweep(self, conductances, repeats, **kwargs):
+        """
+        Runs :meth:`conductance_simulation` for each of the hERG
+        conductances in ``conductances`` and returns the list of logs.
 
-        return d2
+        All simulations share the compiled simulation, and only the hERG
+        conductance is changed between them. Extra keyword arguments are
+        passed to :meth:`conductance_simulation`.
+        """
+        return [self.conductance_simulation(g, repeats, **kwargs)
+                for g in conductances]
 
     def state_occupancy_plot(self, ax, signal_log, pulse=None, legend=True):
 
         if pulse is None:
             ax.stackplot(signal_log.time(),
-                         *[signal_log[s] for s in self.model.states()
-                         if str(s.parent()) == 'ikr' and s.name() != 'D'],
-                         labels=[s.name() for s in self.model.states()
-                         if str(s.parent()) == 'ikr' and s.name() != 'D'],
-                         zorder=-10)
+                         *[signal_log[s] for s in self._ikr_plot_states],
+                         labels=self._ikr_plot_labels, zorder=-10)
         else:
             ax.stackplot(signal_log.time(),
-                         *[signal_log[s, pulse] for s in self.model.states()
-                         if str(s.parent()) == 'ikr' and s.name() != 'D'],
-                         labels=[s.name() for s in self.model.states()
-                         if str(s.parent()) == 'ikr' and s.name() != 'D'],
-                         zorder=-10)
+                         *[signal_log[s, pulse]
+                           for s in self._ikr_plot_states],
+                         labels=self._ikr_plot_labels, zorder=-10)
 
         ax.set_xlabel('Time (ms)')
 
         label_list = []
         for t in ax.get_legend_handles_labels():
             label_list.append(t)
-        new_list = label_list[1]
-        new_list = ['O*' if x == 'Obound' else x for x in new_list]
-        new_list = ['C*' if x == 'Cbound' else x for x in new_list]
-        new_list = ['IO*' if x == 'IObound' else x for x in new_list]
+        label_remap = {'Obound': 'O*', 'Cbound': 'C*', 'IObound': 'IO*'}
+        new_list = [label_remap.get(x, x) for x in label_list[1]]
 
         if legend:
             ax.legend(ncol=2, handles=label_list[0], labels=new_list,
@@ -200,14 +606,22 @@ class BindingKinetics(object):
         return ax
 
     def extract_peak(self, signal_log, current_name):
-        peaks = []
         pulses = len(signal_log.keys_like(current_name))
 
         if pulses == 0:
-            peaks.append(np.max(signal_log[current_name]))
-
-        for i in range(pulses):
-            peaks.append(np.max(signal_log[current_name, i]))
+            signal = np.asarray(signal_log[current_name])
+            if signal.ndim == 2:
+                # Pulses already stacked with shape (pulses, samples)
+                peaks = signal.max(axis=1)
+            else:
+                peaks = signal.max(keepdims=True)
+        else:
+            # Reduce each pulse of a folded log, without copying the pulses
+            # into one array
+            peaks = np.fromiter(
+                (np.max(signal_log[current_name, i]) for i in range(pulses)),
+                dtype=np.float64, count=pulses)
+        peaks = peaks.tolist()
 
         if peaks[0] == 0:
             peak_reduction = 0
@@ -217,197 +631,107 @@ class BindingKinetics(object):
         return peaks, peak_reduction
 
     def APD90(self, signal, offset, timestep):
-        APA = max(signal) - min(signal)
-        APD90_v = min(signal) + 0.1 * APA
-        index = np.abs(np.array(signal) - APD90_v).argmin()
+        # Use the compiled kernel if numba is installed
+        if _apd90_kernel is not None:
+            return _apd90_kernel(
+                np.ascontiguousarray(signal, dtype=np.float64),
+                float(offset), float(timestep))
+
+        signal = np.asarray(signal, dtype=np.float64)
+        signal_min = signal.min()
+        APA = signal.max() - signal_min
+        APD90_v = signal_min + 0.1 * APA
+        # Take the absolute value in place, to only allocate one temporary
+        diff = signal - APD90_v
+        np.abs(diff, out=diff)
+        index = diff.argmin()
         APD90 = index * timestep - offset
         if APD90 < 1:
             APD90 = len(signal) * timestep
 
         return APD90
 
+    def APD90_batch(self, signals, offset, timestep, parallel=False):
+        """
+        Returns the APD90s of the equally long pulses in ``signals``, e.g.
+        the pulses of a folded log, as computed by :meth:`APD90`.
+        If ``parallel`` is ``True`` and numba is installed, the pulses are
+        computed on multiple threads. This should only be used for many
+        pulses, and not in forked worker processes.
+        """
+        # Use the compiled kernel if numba is installed
+        if _apd90_batch_kernel is not None:
+            kernel = _apd90_parallel_kernel if parallel \
+                else _apd90_batch_kernel
+            return kernel(
+                np.ascontiguousarray(signals, dtype=np.float64),
+                float(offset), float(timestep))
+
+        signals = np.asarray(signals, dtype=np.float64)
+        signal_min = signals.min(axis=1, keepdims=True)
+        APA = signals.max(axis=1, keepdims=True) - signal_min
+        APD90_v = signal_min + 0.1 * APA
+        diff = signals - APD90_v
+        np.abs(diff, out=diff)
+        APD90 = diff.argmin(axis=1) * timestep - offset
+        APD90[APD90 < 1] = signals.shape[1] * timestep
+
+        return APD90
+
     def drug_APclamp(self, drug, drug_conc, times, voltages, t_max, repeats,
-                     timestep=0.1, save_signal=1, log_var=None, abs_tol=1e-6,
-                     rel_tol=1e-4):
-        param_lib = modelling.BindingParameters()
-
-        Vhalf = param_lib.binding_parameters[drug]['Vhalf']
-        Kmax = param_lib.binding_parameters[drug]['Kmax']
-        Ku = param_lib.binding_parameters[drug]['Ku']
-        N = param_lib.binding_parameters[drug]['N']
-        EC50 = param_lib.binding_parameters[drug]['EC50']
-
-        concentration = self.model.get('ikr.D')
-        concentration.set_state_value(drug_conc)
-
-        self.sim = myokit.Simulation(self.model)
-        self.sim.set_fixed_form_protocol(times, voltages)
-        self.sim.reset()
+                     timestep=0.1, save_signal=1, log_var=None, abs_tol=None,
+                     rel_tol=None, output_dtype=np.float64):
+        # The AP clamp uses a fixed-form protocol, so it has its own cached
+        # simulation
+        if self._APclamp_sim is None:
+            self._APclamp_sim = cached_simulation(self.model)
+        sim = self._APclamp_sim
+
+        # Repeat the AP clamp for the saved pulses
+        times = np.asarray(times, dtype=np.float64)
+        sim.set_protocol(myokit.TimeSeriesProtocol(
+            np.concatenate([times + t_max * k for k in range(save_signal)]),
+            np.tile(np.asarray(voltages, dtype=np.float64), save_signal)))
+
+        self._reset_simulation(sim, abs_tol, rel_tol, drug_conc=drug_conc)
         # self.sim.set_state(self.initial_state)
 
-        self.sim.set_tolerance(abs_tol=abs_tol, rel_tol=rel_tol)
-
-        self.sim.set_constant(self.current_head.var('Vhalf'), Vhalf)
-        self.sim.set_constant(self.current_head.var('Kmax'), Kmax)
-        self.sim.set_constant(self.current_head.var('Ku'), Ku)
-        self.sim.set_constant(self.current_head.var('n'), N)
-        self.sim.set_constant(self.current_head.var('halfmax'), EC50)
-        self.sim.set_constant(self.current_head.var('Kt'), 3.5e-5)
-        self.sim.set_constant(self.current_head.var('gKr'),
-                              self.original_constants["gKr"])
-
-        for pace in range(1000):
-            self.sim.run(t_max, log=myokit.LOG_NONE)
-            self.sim.set_time(0)
-        log = self.sim.run(t_max)
-        # self.sim.pre(t_max * (repeats - save_signal))
-        # log = self.sim.run(t_max * save_signal, log=log_var,
-        #                    log_interval=timestep)
-        d2 = log.npview()
-        if save_signal > 1:
-            d2 = d2.fold(t_max)
+        self._apply_binding_constants(self._drug_constants(drug), sim=sim)
 
-        self.sim.reset()
+        # The time series protocol is not periodic, but pre() does not advance
+        # the simulation time, so every call paces one pulse of the AP clamp.
+        # Tiling the AP clamp over all pulses instead would build a protocol
+        # with repeats times as many points as the AP
+        for pace in range(repeats - save_signal):
+            sim.pre(t_max)
+        log = sim.run(t_max * save_signal, log=log_var,
+                      log_interval=timestep)
+        d2 = self._log_to_numpy(log, t_max, save_signal, output_dtype)
 
         return d2
 
     def drug_multiion_simulation(self, drug, drug_conc, ion_scale, repeats,
                                  timestep=0.1, save_signal=1, log_var=None,
-                                 set_state=None, abs_tol=1e-6, rel_tol=1e-4):
-        param_lib = modelling.BindingParameters()
-
-        Vhalf = param_lib.binding_parameters[drug]['Vhalf']
-        Kmax = param_lib.binding_parameters[drug]['Kmax']
-        Ku = param_lib.binding_parameters[drug]['Ku']
-        N = param_lib.binding_parameters[drug]['N']
-        EC50 = param_lib.binding_parameters[drug]['EC50']
-
+                                 set_state=None, abs_tol=None, rel_tol=None,
+                                 output_dtype=np.float64):
         t_max = self.protocol.characteristic_time()
 
-        concentration = self.model.get('ikr.D')
-        concentration.set_state_value(drug_conc)
-
-        self.sim = myokit.Simulation(self.model, self.protocol)
-        self.sim.reset()
-        self.sim.set_tolerance(abs_tol=abs_tol, rel_tol=rel_tol)
-        if set_state:
-            set_state['ikr.D'][-1] = drug_conc
-            self.sim.set_state(set_state)
-
-        self.sim.set_constant(self.current_head.var('Vhalf'), Vhalf)
-        self.sim.set_constant(self.current_head.var('Kmax'), Kmax)
-        self.sim.set_constant(self.current_head.var('Ku'), Ku)
-        self.sim.set_constant(self.current_head.var('n'), N)
-        self.sim.set_constant(self.current_head.var('halfmax'), EC50)
-        self.sim.set_constant(self.current_head.var('Kt'), 3.5e-5)
-        self.sim.set_constant(self.current_head.var('gKr'),
-                              self.original_constants["gKr"])
-
         # Scale conductace of ion channels other than hERG
-        base_conductance = self.model.get(self.model.get('inal').var(
-            'gNaL')).eval()
-        self.sim.set_constant(self.model.get('inal').var('gNaL'),
-                              base_conductance * ion_scale['INaL'])
-        base_conductance = self.model.get(self.model.get('ical').var(
-            'base')).eval()
-        self.sim.set_constant(self.model.get('ical').var('base'),
-                              base_conductance * ion_scale['ICaL'])
-        base_conductance = self.model.get(self.model.get('ina').var(
-            'gNa')).eval()
-        self.sim.set_constant(self.model.get('ina').var('gNa'),
-                              base_conductance * ion_scale['INa'])
-        base_conductance = self.model.get(self.model.get('ito').var(
-            'gto')).eval()
-        self.sim.set_constant(self.model.get('ito').var('gto'),
-                              base_conductance * ion_scale['Ito'])
-        base_conductance = self.model.get(self.model.get('ik1').var(
-            'gK1')).eval()
-        self.sim.set_constant(self.model.get('ik1').var('gK1'),
-                              base_conductance * ion_scale['IK1'])
-        base_conductance = self.model.get(self.model.get('iks').var(
-            'gKs')).eval()
-        self.sim.set_constant(self.model.get('iks').var('gKs'),
-                              base_conductance * ion_scale['IKs'])
-
-        self.sim.pre(t_max * (repeats - save_signal))
-        log = self.sim.run(t_max * save_signal, log=log_var,
-                           log_interval=timestep)
-        d2 = log.npview()
-        if save_signal > 1:
-            d2 = d2.fold(t_max)
-
-        # self.sim.reset()
-
-        return d2
+        return self._run(self._drug_constants(drug), repeats, save_signal,
+                         timestep, log_var, abs_tol, rel_tol, t_max,
+                         drug_conc=drug_conc, set_state=set_state,
+                         ion_scale=ion_scale, output_dtype=output_dtype)
 
     def drug_multiion_CS_sim(self, ion_scale, repeats,
                              timestep=0.1, save_signal=1, log_var=None,
-                             abs_tol=1e-6, rel_tol=1e-4):
-        # param_lib = modelling.BindingParameters()
-
-        # Vhalf = param_lib.binding_parameters[drug]['Vhalf']
-        # Kmax = param_lib.binding_parameters[drug]['Kmax']
-        # Ku = param_lib.binding_parameters[drug]['Ku']
-        # N = param_lib.binding_parameters[drug]['N']
-        # EC50 = param_lib.binding_parameters[drug]['EC50']
-
+                             abs_tol=None, rel_tol=None,
+                             output_dtype=np.float64):
         t_max = self.protocol.characteristic_time()
 
-        # concentration = self.model.get('ikr.D')
-        # concentration.set_state_value(drug_conc)
-
-        self.sim = myokit.Simulation(self.model, self.protocol)
-        self.sim.reset()
-        self.sim.set_tolerance(abs_tol=abs_tol, rel_tol=rel_tol)
-        # if set_state:
-        #     set_state['ikr.D'][-1] = drug_conc
-        #     self.sim.set_state(set_state)
-
-        # self.sim.set_constant(self.current_head.var('Vhalf'), Vhalf)
-        # self.sim.set_constant(self.current_head.var('Kmax'), Kmax)
-        # self.sim.set_constant(self.current_head.var('Ku'), Ku)
-        # self.sim.set_constant(self.current_head.var('n'), N)
-        # self.sim.set_constant(self.current_head.var('halfmax'), EC50)
-        # self.sim.set_constant(self.current_head.var('Kt'), 3.5e-5)
-        # self.sim.set_constant(self.current_head.var('gKr'),
-        #                       self.original_constants["gKr"])
-
-        # Scale conductace of ion channels other than hERG
-        self.sim.set_constant(
-            self.model.get('ikr').var('gKr'),
-            self.original_constants["gKr"] * ion_scale['IKr'])
-        base_conductance = self.model.get(self.model.get('inal').var(
-            'gNaL')).eval()
-        self.sim.set_constant(self.model.get('inal').var('gNaL'),
-                              base_conductance * ion_scale['INaL'])
-        base_conductance = self.model.get(self.model.get('ical').var(
-            'base')).eval()
-        self.sim.set_constant(self.model.get('ical').var('base'),
-                              base_conductance * ion_scale['ICaL'])
-        base_conductance = self.model.get(self.model.get('ina').var(
-            'gNa')).eval()
-        self.sim.set_constant(self.model.get('ina').var('gNa'),
-                              base_conductance * ion_scale['INa'])
-        base_conductance = self.model.get(self.model.get('ito').var(
-            'gto')).eval()
-        self.sim.set_constant(self.model.get('ito').var('gto'),
-                              base_conductance * ion_scale['Ito'])
-        base_conductance = self.model.get(self.model.get('ik1').var(
-            'gK1')).eval()
-        self.sim.set_constant(self.model.get('ik1').var('gK1'),
-                              base_conductance * ion_scale['IK1'])
-        base_conductance = self.model.get(self.model.get('iks').var(
-            'gKs')).eval()
-        self.sim.set_constant(self.model.get('iks').var('gKs'),
-                              base_conductance * ion_scale['IKs'])
-
-        self.sim.pre(t_max * (repeats - save_signal))
-        log = self.sim.run(t_max * save_signal, log=log_var,
-                           log_interval=timestep)
-        d2 = log.npview()
-        if save_signal > 1:
-            d2 = d2.fold(t_max)
-
-        # self.sim.reset()
-
-        return d2
+        # Scale conductace of ion channels, keeping the hERG-binding
+        # constants of the model
+        return self._run(
+            self._model_constants(
+                self.original_constants["gKr"] * ion_scale['IKr']),
+            repeats, save_signal, timestep, log_var, abs_tol, rel_tol, t_max,
+            ion_scale=ion_scale, output_dtype=output_dtype)
@@ -31,16 +31,15 @@ class ModelComparison(object):
 
         drug_conc = [i / norm_constant for i in drug_conc]
 
-        peaks = []
+        peaks = np.empty(len(drug_conc))
         for i in range(len(drug_conc)):
             log = BKmodel.custom_simulation(
                 self.drug_param_values, drug_conc[i], steady_state_pulse,
                 log_var=['engine.time', 'ikr.IKr'],
                 abs_tol=1e-7, rel_tol=1e-8)
-            peak, _ = BKmodel.extract_peak(log, 'ikr.IKr')
-            peaks.append(peak[-1])
+            peaks[i] = np.max(log['ikr.IKr'])
 
-        peaks_norm = (peaks - min(peaks)) / (max(peaks) - min(peaks))
+        peaks_norm = (peaks - peaks.min()) / (peaks.max() - peaks.min())
 
         # Make sure there are enough data points for the head of Hill curve
         data_pt_checker = [True if i > Hill_upper_thres else False
@@ -52,9 +51,8 @@ class ModelComparison(object):
                 self.drug_param_values, drug_conc[1], steady_state_pulse,
                 log_var=['engine.time', 'ikr.IKr'],
                 abs_tol=1e-7, rel_tol=1e-8)
-            peak, _ = BKmodel.extract_peak(log, 'ikr.IKr')
-            peaks.insert(1, peak[-1])
-            peaks_norm = (peaks - min(peaks)) / (max(peaks) - min(peaks))
+            peaks = np.insert(peaks, 1, np.max(log['ikr.IKr']))
+            peaks_norm = (peaks - peaks.min()) / (peaks.max() - peaks.min())
             data_pt_checker = [True if i > Hill_upper_thres else False
                                for i in peaks_norm]
             counter += 1
@@ -72,9 +70,8 @@ class ModelComparison(object):
                 self.drug_param_values, drug_conc[-1], steady_state_pulse,
                 log_var=['engine.time', 'ikr.IKr'],
                 abs_tol=1e-7, rel_tol=1e-8)
-            peak, _ = BKmodel.extract_peak(log, 'ikr.IKr')
-            peaks.append(peak[-1])
-            peaks_norm = (peaks - min(peaks)) / (max(peaks) - min(peaks))
+            peaks = np.append(peaks, np.max(log['ikr.IKr']))
+            peaks_norm = (peaks - peaks.min()) / (peaks.max() - peaks.min())
             data_pt_checker = [True if i < Hill_lower_thres else False
                                for i in peaks_norm]
             counter += 1
@@ -95,11 +92,16 @@ class ModelComparison(object):
                 abs_tol=1e-7, rel_tol=1e-8):
 
         base_conductance = AP_model.original_constants['gKr']
-        APD_trapping = []
-        APD_conductance = []
         if drug_conc is None:
             drug_conc = 10**np.linspace(-1, 5, data_points)
         drug_conc = list(drug_conc)
+        APD_trapping = np.empty((len(drug_conc), save_signal))
+        APD_conductance = np.empty((len(drug_conc), save_signal))
+
+        # Compute the conductance scaling of the conductance model at all drug
+        # concentrations at once
+        reduction_scales = self.Hill_model.simulate(
+            Hill_curve_coefs, np.array(drug_conc) * norm_constant)
 
         for i in range(len(drug_conc)):
             # Run simulation for trapping model
@@ -109,29 +111,24 @@ class ModelComparison(object):
                 rel_tol=rel_tol, log_var=['engine.time', 'membrane.V'])
 
             # Compute APD90
-            APD_trapping_pulse = []
-            for pulse in range(save_signal):
-                apd90 = AP_model.APD90(log['membrane.V', pulse], offset, 0.1)
-                APD_trapping_pulse.append(apd90)
-            APD_trapping.append(APD_trapping_pulse)
+            APD_trapping[i] = AP_model.APD90_batch(
+                [log['membrane.V', pulse] for pulse in range(save_signal)],
+                offset, 0.1)
 
             # Run simulation for conductance model
-            reduction_scale = self.Hill_model.simulate(
-                Hill_curve_coefs, drug_conc[i] * norm_constant)
             d2 = AP_model.conductance_simulation(
-                base_conductance * reduction_scale, steady_state_pulse,
+                base_conductance * reduction_scales[i], steady_state_pulse,
                 timestep=0.1, save_signal=save_signal, abs_tol=abs_tol,
                 rel_tol=rel_tol, log_var=['engine.time', 'membrane.V'])
 
             # Compute APD90
-            APD_conductance_pulse = []
-            for pulse in range(save_signal):
-                apd90 = AP_model.APD90(d2['membrane.V', pulse], offset, 0.1)
-                APD_conductance_pulse.append(apd90)
-            APD_conductance.append(APD_conductance_pulse)
-
-        APD_trapping = [max(i) for i in APD_trapping]
-        APD_conductance = [max(i) for i in APD_conductance]
+            APD_conductance[i] = AP_model.APD90_batch(
+                [d2['membrane.V', pulse] for pulse in range(save_signal)],
+                offset, 0.1)
+
+        # Compute APD90 with AP behaviour in alternating cycles
+        APD_trapping = APD_trapping.max(axis=1).tolist()
+        APD_conductance = APD_conductance.max(axis=1).tolist()
         if EAD:
             checker_trapping = [True if i >= 1000 else False
                                 for i in APD_trapping]
@@ -148,12 +145,10 @@ class ModelComparison(object):
                     rel_tol=rel_tol, log_var=['engine.time', 'membrane.V'])
 
                 # Compute APD90
-                APD_trapping_pulse = []
-                for pulse in range(save_signal):
-                    apd90 = AP_model.APD90(log['membrane.V', pulse],
-                                           offset, 0.1)
-                    APD_trapping_pulse.append(apd90)
-                APD_trapping.append(max(APD_trapping_pulse))
+                APD_trapping_pulse = AP_model.APD90_batch(
+                    [log['membrane.V', pulse] for pulse in range(save_signal)],
+                    offset, 0.1)
+                APD_trapping.append(float(APD_trapping_pulse.max()))
 
                 # Run simulation for conductance model
                 reduction_scale = self.Hill_model.simulate(
@@ -164,12 +159,10 @@ class ModelComparison(object):
                     rel_tol=rel_tol, log_var=['engine.time', 'membrane.V'])
 
                 # Compute APD90
-                APD_conductance_pulse = []
-                for pulse in range(save_signal):
-                    apd90 = AP_model.APD90(d2['membrane.V', pulse],
-                                           offset, 0.1)
-                    APD_conductance_pulse.append(apd90)
-                APD_conductance.append(max(APD_conductance_pulse))
+                APD_conductance_pulse = AP_model.APD90_batch(
+                    [d2['membrane.V', pulse] for pulse in range(save_signal)],
+                    offset, 0.1)
+                APD_conductance.append(float(APD_conductance_pulse.max()))
 
                 checker_trapping = [True if i >= 1000 else False
                                     for i in APD_trapping]
@@ -16,7 +16,7 @@ drug = sys.argv[1]
 protocol_name = 'Milnes'
 protocol_params = modelling.ProtocolParameters()
 pulse_time = protocol_params.protocol_parameters[protocol_name]['pulse_time']
-protocol = protocol_params.protocol_parameters[protocol_name]['function']
+protocol = protocol_params.get_protocol(protocol_name)
 
 # Define drug concentration range for each drug of interest
 if drug == 'dofetilide':
@@ -54,7 +54,7 @@ base_conductance = APmodel.get('ikr.gKr').value()
 if not os.path.isfile(data_dir + result_filename):
     param_lib = modelling.BindingParameters()
     param_values = param_lib.binding_parameters[drug]
-    param_values = pd.DataFrame(data=param_values, index=[0])
+    param_values = pd.DataFrame(data=dict(param_values), index=[0])
     ComparisonController = modelling.ModelComparison(param_values)
     estimates, _, _ = ComparisonController.compute_Hill(current_model)
     with open(data_dir + result_filename, 'w') as f:
@@ -82,6 +82,9 @@ else:
 AP_conductance = []
 AP_trapping = []
 
+# Scale the ionic conductance of the AP-CS model with the Hill curve
+reduction_scales = Hill_model.simulate(estimates[:2], drug_conc)
+
 for i in range(len(drug_conc)):
     print('simulating for drug concentration: ' + str(drug_conc[i]))
     log = AP_model.drug_simulation(
@@ -91,9 +94,8 @@ for i in range(len(drug_conc)):
     log.save_csv(data_dir + 'SD_AP_transient_pulses' + str(repeats) +
                  '_conc' + str(drug_conc[i]) + '_paced.csv')
 
-    reduction_scale = Hill_model.simulate(estimates[:2], drug_conc[i])
     d2 = AP_model.conductance_simulation(
-        base_conductance * reduction_scale, repeats,
+        base_conductance * reduction_scales[i], repeats,
         save_signal=save_signal,
         log_var=['engine.time', 'membrane.V', 'ikr.IKr'],
         set_state=control_log)
@@ -102,9 +104,10 @@ for i in range(len(drug_conc)):
 
 # Remove drug free condition
 drug_conc = drug_conc[1:]
+reduction_scales = reduction_scales[1:]
 
-APD_conductance = []
-APD_trapping = []
+V_conductance = []
+V_trapping = []
 
 # Simulate the AP models for 300 pulses to show transition of APD to steady
 # state
@@ -118,27 +121,25 @@ for i in range(len(drug_conc)):
         log_var=['engine.time', 'membrane.V', 'ikr.IKr'],
         set_state=control_log)
 
-    APD_trapping_pulse = []
-    for pulse in range(save_signal):
-        apd90 = AP_model.APD90(log['membrane.V', pulse], offset, 0.1)
-        APD_trapping_pulse.append(apd90)
-
-    APD_trapping.append(APD_trapping_pulse)
+    V_trapping.extend(
+        [log['membrane.V', pulse] for pulse in range(save_signal)])
 
-    reduction_scale = Hill_model.simulate(estimates[:2], drug_conc[i])
     d2 = AP_model.conductance_simulation(
-        base_conductance * reduction_scale, repeats,
+        base_conductance * reduction_scales[i], repeats,
         save_signal=save_signal,
         log_var=['engine.time', 'membrane.V', 'ikr.IKr'],
         set_state=control_log)
 
-    APD_conductance_pulse = []
-
-    for pulse in range(save_signal):
-        apd90 = AP_model.APD90(d2['membrane.V', pulse], offset, 0.1)
-        APD_conductance_pulse.append(apd90)
+    V_conductance.extend(
+        [d2['membrane.V', pulse] for pulse in range(save_signal)])
 
-    APD_conductance.append(APD_conductance_pulse)
+# Compute the APD90s of the pulses at all concentrations together
+APD_trapping = AP_model.APD90_batch(
+    V_trapping, offset, 0.1, parallel=True).reshape(
+    len(drug_conc), save_signal)
+APD_conductance = AP_model.APD90_batch(
+    V_conductance, offset, 0.1, parallel=True).reshape(
+    len(drug_conc), save_signal)
 
 # Save simulated APD
 APD_trapping_df = pd.DataFrame(np.array(APD_trapping))
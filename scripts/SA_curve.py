@@ -11,7 +11,6 @@ import myokit
 import numpy as np
 import os
 import pandas as pd
-import pints
 import time
 
 import modelling
@@ -31,7 +30,7 @@ model, _, x = myokit.load(model)
 current_model = modelling.BindingKinetics(model)
 
 protocol_params = modelling.ProtocolParameters()
-protocol = protocol_params.protocol_parameters['Milnes']['function']
+protocol = protocol_params.get_protocol('Milnes')
 current_model.protocol = protocol
 
 # Load AP model and set current protocol
@@ -130,9 +129,8 @@ def param_evaluation(param_values):
             MAError = float("Nan")
 
     # Create dataframe to save results
-    conc_Hill_ind = ['conc_' + str(i) for i, _ in
-                     enumerate(drug_conc_Hill)]
-    conc_AP_ind = ['conc_' + str(i) for i, _ in enumerate(drug_conc_AP)]
+    conc_Hill_ind = [f'conc_{i}' for i in range(len(drug_conc_Hill))]
+    conc_AP_ind = [f'conc_{i}' for i in range(len(drug_conc_AP))]
     index_dict = {'param_id': ['param_id'],
                   'drug_conc_Hill': conc_Hill_ind,
                   'peak_current': conc_Hill_ind,
@@ -230,10 +228,10 @@ else:
     saving_file_dict = {'file_num': sorted(file_num_to_run),
                         'sample_id_each_file': file_id_dict}
 
-# Use PINTS' parallel evaluator to evaluate the APD90 difference for each
+# Use the forked parallel evaluator to evaluate the APD90 difference for each
 # virtual drugs in the parameter space
 n_workers = 8
-evaluator = pints.ParallelEvaluator(param_evaluation,
+evaluator = modelling.ForkEvaluator(param_evaluation,
                                     n_workers=n_workers)
 for file_num in saving_file_dict['file_num']:
     print('Starting function evaluation for file number: ', file_num)
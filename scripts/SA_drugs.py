@@ -3,10 +3,12 @@
 # for all synthetic drug.
 #
 
+import itertools
+import math
 import myokit
 import numpy as np
-import os
 import pandas as pd
+import pathlib
 
 import modelling
 
@@ -15,16 +17,16 @@ data_dir = '../simulation_data/'
 
 # Load current model and set Milnes' protocol
 model = '../math_model/ohara-cipa-v1-2017-IKr-opt.mmt'
-model, _, x = myokit.load(model)
+model = myokit.load_model(model)
 drug_model = modelling.BindingKinetics(model)
 
 protocol_params = modelling.ProtocolParameters()
-protocol = protocol_params.protocol_parameters['Milnes']['function']
+protocol = protocol_params.get_protocol('Milnes')
 drug_model.protocol = protocol
 
 # Load AP model and set current protocol
 APmodel = '../math_model/ohara-cipa-v1-2017-opt.mmt'
-APmodel, _, x = myokit.load(APmodel)
+APmodel = myokit.load_model(APmodel)
 AP_model = modelling.BindingKinetics(APmodel, current_head='ikr')
 pulse_time = 1000
 AP_model.protocol = modelling.ProtocolLibrary().current_impulse(pulse_time)
@@ -44,18 +46,50 @@ drug_list = param_lib.drug_compounds
 SA_model = modelling.SensitivityAnalysis()
 param_names = SA_model.param_names
 
+# The same model comparison is used for all drugs, with the parameter values
+# of each drug set before it is evaluated
+starting_param_df = pd.DataFrame([1] * 5, index=param_names).T
+ComparisonController = modelling.ModelComparison(starting_param_df)
 
-def param_evaluation(param_values, drug):
+# The index of the results only depends on the number of drug
+# concentrations, so it is built once for each number of concentrations
+result_indices = {}
+
+
+def result_index(n_conc_Hill, n_conc_AP):
+    key = (n_conc_Hill, n_conc_AP)
+    if key not in result_indices:
+        conc_Hill_ind = [f'conc_{i}' for i in range(n_conc_Hill)]
+        conc_AP_ind = [f'conc_{i}' for i in range(n_conc_AP)]
+        index_dict = {'drug': ['drug'],
+                      'drug_conc_Hill': conc_Hill_ind,
+                      'peak_current': conc_Hill_ind,
+                      'Hill_curve': ['Hill_coef', 'IC50'],
+                      'param_values': param_names,
+                      'drug_conc_AP': conc_AP_ind,
+                      'APD_trapping': conc_AP_ind,
+                      'APD_conductance': conc_AP_ind, 'RMSE': ['RMSE'],
+                      'ME': ['ME']}
+        all_index = [(i, j) for i in index_dict.keys()
+                     for j in index_dict[i]]
+        result_indices[key] = pd.MultiIndex.from_tuples(all_index)
+
+    return result_indices[key]
+
+
+def param_evaluation(drug):
 
     # Define parameter values of synthetic drug
     print('Running for drug: ', drug)
-    orig_half_effect_conc = param_values['EC50'][0]
-    param_values['EC50'][0] = 1
-    ComparisonController.drug_param_values = param_values
+    param_values = dict(zip(param_lib.parameter_names, param_lib.get(drug)))
 
     # Calculate the normalising constant
-    Hill_n = param_values['N'][0]
-    norm_constant = np.power(orig_half_effect_conc, 1 / Hill_n)
+    norm_constant = math.pow(param_values['EC50'], 1 / param_values['N'])
+
+    # The drug concentration is normalised, so the EC50 of the model is 1
+    norm_param_values = pd.DataFrame([dict(param_values, EC50=1.0)],
+                                     columns=param_names)
+    ComparisonController.drug_param_values = norm_param_values
 
     # Compute Hill curve of the synthetic drug with the SD model
     Hill_curve_coefs, drug_conc_Hill, peaks_norm = \
@@ -73,11 +107,11 @@ def param_evaluation(param_values, drug):
                                    APD_points)
 
     if isinstance(Hill_curve_coefs, str):
-        Hill_curve_coefs = [float("nan")] * 2
-        APD_trapping = [float("Nan")] * APD_points
-        APD_conductance = [float("Nan")] * APD_points
-        RMSError = float("Nan")
-        MAError = float("Nan")
+        Hill_curve_coefs = np.full(2, np.nan)
+        APD_trapping = np.full(APD_points, np.nan)
+        APD_conductance = np.full(APD_points, np.nan)
+        RMSError = np.nan
+        MAError = np.nan
     else:
         # Simulate APs and APD90s of the AP-SD model and the AP-CS model
         APD_trapping, APD_conductance, drug_conc_AP = \
@@ -92,67 +126,41 @@ def param_evaluation(param_values, drug):
                                                   APD_conductance)
 
     # Create dataframe to save results
-    conc_Hill_ind = ['conc_' + str(i) for i, _ in
-                     enumerate(drug_conc_Hill)]
-    conc_AP_ind = ['conc_' + str(i) for i, _ in enumerate(drug_conc_AP)]
-    index_dict = {'drug': ['drug'],
-                  'drug_conc_Hill': conc_Hill_ind,
-                  'peak_current': conc_Hill_ind,
-                  'Hill_curve': ['Hill_coef', 'IC50'],
-                  'param_values': param_names, 'drug_conc_AP': conc_AP_ind,
-                  'APD_trapping': conc_AP_ind,
-                  'APD_conductance': conc_AP_ind, 'RMSE': ['RMSE'],
-                  'ME': ['ME']}
-    all_index = [(i, j) for i in index_dict.keys() for j in index_dict[i]]
-    index = pd.MultiIndex.from_tuples(all_index)
-
-    param_values['EC50'][0] = orig_half_effect_conc
-    big_df = pd.DataFrame(
-        [drug] + drug_conc_Hill + list(peaks_norm) + list(Hill_curve_coefs) +
-        list(param_values.values[0]) + list(drug_conc_AP) + APD_trapping +
-        APD_conductance + [RMSError] + [MAError], index=index)
+    index = result_index(len(drug_conc_Hill), len(drug_conc_AP))
+
+    # The results of a drug form one row
+    row = list(itertools.chain(
+        [drug], drug_conc_Hill, peaks_norm, Hill_curve_coefs,
+        [param_values[i] for i in param_names], drug_conc_AP, APD_trapping,
+        APD_conductance, [RMSError, MAError]))
+    big_df = pd.DataFrame([row], columns=index)
 
     return big_df
 
 
 # Determine completed simulations so that same simulations are not repeated
-filename = 'SA_alldrugs.csv'
-if os.path.exists(data_dir + filename):
-    results_df = pd.read_csv(data_dir + filename, header=[0, 1], index_col=[0],
+csv_path = pathlib.Path(data_dir, 'SA_alldrugs.csv')
+if csv_path.exists():
+    results_df = pd.read_csv(csv_path, header=[0, 1], index_col=[0],
                              skipinitialspace=True)
     ran_drugs = results_df['drug']['drug'].values
 else:
+    results_df = None
     ran_drugs = []
 
 drug_list = [i for i in drug_list if i not in ran_drugs]
 
-first_iter = True
-for drug in drug_list:
-
-    # Get parameter values of each synthetic drug
-    Vhalf = param_lib.binding_parameters[drug]['Vhalf']
-    Kmax = param_lib.binding_parameters[drug]['Kmax']
-    Ku = param_lib.binding_parameters[drug]['Ku']
-    Hill_n = param_lib.binding_parameters[drug]['N']
-    half_effect_conc = param_lib.binding_parameters[drug]['EC50']
-
-    all_params = [Vhalf, Kmax, Ku, Hill_n, half_effect_conc]
-
-    # Define parameter values input to the system
-    orig_param_values = pd.DataFrame(all_params, index=param_names)
-    orig_param_values = orig_param_values.T
-    ComparisonController = modelling.ModelComparison(orig_param_values)
-
-    # Evaluate the RMSD and MD between APD90s of a synthetic drug from the
-    # AP-SD model and the AP-CS model
-    if not os.path.exists(data_dir + filename):
-        results_df = param_evaluation(orig_param_values, drug)
-        results_df = results_df.T
-        first_iter = False
-    else:
-        results_df = pd.read_csv(data_dir + filename, header=[0, 1],
-                                 index_col=[0], skipinitialspace=True)
-        big_df = param_evaluation(orig_param_values, drug)
-        results_df = pd.concat([results_df, big_df.T])
+# Use the forked parallel evaluator to evaluate the APD90 differences of the
+# synthetic drugs in parallel
+n_workers = 8
+evaluator = modelling.ForkEvaluator(param_evaluation, n_workers=n_workers)
+
+# Evaluate the RMSD and MD between APD90s of a synthetic drug from the
+# AP-SD model and the AP-CS model
+for big_df in evaluator.evaluate_unordered(drug_list):
+    results_df = pd.concat([results_df, big_df])
 
-    results_df.to_csv(data_dir + filename)
+    # Save after every drug so that completed simulations are kept
+    # The number of drug concentrations differs between drugs, so the results
+    # are saved together rather than appended
+    results_df.to_csv(csv_path)
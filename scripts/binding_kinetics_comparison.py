@@ -23,10 +23,13 @@ import modelling
 
 # Define drug and protocol
 drug = sys.argv[1]
+# Simulated data that has been saved is loaded instead of simulated again,
+# unless the --force flag is given
+force = '--force' in sys.argv[2:]
 protocol_name = 'Milnes'
 protocol_params = modelling.ProtocolParameters()
 pulse_time = protocol_params.protocol_parameters[protocol_name]['pulse_time']
-protocol = protocol_params.protocol_parameters[protocol_name]['function']
+protocol = protocol_params.get_protocol(protocol_name)
 
 # Define the range of drug concentration for a given drug
 drug_conc_lib = modelling.DrugConcentrations()
@@ -51,27 +54,38 @@ current_model.protocol = protocol
 abs_tol = 1e-7
 rel_tol = 1e-8
 
+
 # Simulate IKr of the SD model for a range of drug concentrations
 # Extract the peak of IKr
-peaks = []
-for i in range(len(drug_conc)):
-    log = current_model.drug_simulation(
-        drug, drug_conc[i], repeats,
-        log_var=['engine.time', 'membrane.V', 'ikr.IKr'], abs_tol=abs_tol,
-        rel_tol=rel_tol)
-    peak, _ = current_model.extract_peak(log, 'ikr.IKr')
-    peaks.append(peak[-1])
+def SD_current_peak(conc):
+    filename = data_dir + 'SD_current_' + str(conc) + '.zip'
+    if os.path.isfile(filename) and not force:
+        log = myokit.DataLog.load(filename)
+    else:
+        log = current_model.drug_simulation(
+            drug, conc, repeats,
+            log_var=['engine.time', 'membrane.V', 'ikr.IKr'],
+            abs_tol=abs_tol, rel_tol=rel_tol)
+        log.save(filename)
+
+    return float(np.max(log['ikr.IKr']))
+
 
-    log.save_csv(data_dir + 'SD_current_' + str(drug_conc[i]) + '.csv')
+# Use the forked parallel evaluator to simulate the drug concentrations in
+# parallel
+evaluator = modelling.ForkEvaluator(SD_current_peak)
+peaks = np.array(evaluator.evaluate(drug_conc))
 
 # Normalise drug response (peak current)
-peaks = (peaks - min(peaks)) / (max(peaks) - min(peaks))
+peak_min, peak_max = peaks.min(), peaks.max()
+peaks = (peaks - peak_min) / (peak_max - peak_min)
 
 # Fit drug response to Hill curve
 Hill_model = modelling.HillsModel()
 optimiser = modelling.HillsModelOpt(Hill_model)
-if not os.path.isfile(data_dir + result_filename):
-    estimates, _ = optimiser.optimise(drug_conc, peaks)
+if not os.path.isfile(data_dir + result_filename) or force:
+    estimates, _ = optimiser.optimise(drug_conc, peaks, n_starts=16,
+                                      seed=0)
     with open(data_dir + result_filename, 'w') as f:
         for x in estimates:
             f.write(pints.strfloat(x) + '\n')
@@ -82,15 +96,24 @@ else:
 # Compare peak current
 base_conductance = model.get('ikr.gKr').value()
 current_model.current_head = current_model.model.get('ikr')
-for i in range(len(drug_conc)):
 
-    reduction_scale = Hill_model.simulate(estimates[:2], drug_conc[i])
+
+def CS_current(conc):
+    filename = data_dir + 'CS_current_' + str(conc) + '.zip'
+    if os.path.isfile(filename) and not force:
+        return
+
+    reduction_scale = Hill_model.simulate(estimates[:2], conc)
     d2 = current_model.conductance_simulation(
         base_conductance * reduction_scale, repeats,
         log_var=['engine.time', 'membrane.V', 'ikr.IKr'],
         abs_tol=abs_tol, rel_tol=rel_tol)
 
-    d2.save_csv(data_dir + 'CS_current_' + str(drug_conc[i]) + '.csv')
+    d2.save(filename)
+
+
+evaluator = modelling.ForkEvaluator(CS_current)
+evaluator.evaluate(drug_conc)
 
 #
 # Propagate to action potential
@@ -108,6 +131,13 @@ base_conductance = APmodel.get('ikr.gKr').value()
 
 offset = 50
 save_signal = 2
+
+# Define tolerance value of the AP simulations
+# tolerance_convergence.py reports the loosest tolerances for which the
+# APD90s stay within 0.05 ms of those at the tightest tolerances
+APD_ABS_TOL = 1e-7
+APD_REL_TOL = 1e-8
+
 # Use different repeats for plotting purpose - so that EAD-like behaviour
 # happens on the same pulse
 if drug == 'dofetilide':
@@ -117,46 +147,81 @@ else:
     repeats_SD = 1000
     repeats_CS = 1000
 
-AP_conductance = []
-AP_trapping = []
-APD_conductance = []
-APD_trapping = []
 
 # Simulate AP of the AP-SD model and the AP-CS model
 # Compute APD90
-for i in range(len(drug_conc)):
-    print('simulating concentration: ' + str(drug_conc[i]))
-    log = AP_model.drug_simulation(
-        drug, drug_conc[i], repeats_SD, save_signal=save_signal,
-        log_var=['engine.time', 'membrane.V', 'ikr.IKr'], abs_tol=abs_tol,
-        rel_tol=rel_tol)
-    log.save_csv(data_dir + 'SD_AP_' + str(drug_conc[i]) + '.csv')
-
-    APD_trapping_pulse = []
-    for pulse in range(save_signal):
-        apd90 = AP_model.APD90(log['membrane.V', pulse], offset, 0.1)
-        APD_trapping_pulse.append(apd90)
-
-    AP_trapping.append(log)
-    APD_trapping.append(APD_trapping_pulse)
-
-    reduction_scale = Hill_model.simulate(estimates[:2], drug_conc[i])
-    d2 = AP_model.conductance_simulation(
-        base_conductance * reduction_scale, repeats_CS,
-        save_signal=save_signal,
-        log_var=['engine.time', 'membrane.V', 'ikr.IKr'], abs_tol=abs_tol,
-        rel_tol=rel_tol)
-    d2.save_csv(data_dir + 'CS_AP_' + str(drug_conc[i]) + '.csv')
-
-    APD_conductance_pulse = []
-    for pulse in range(save_signal):
-        apd90 = AP_model.APD90(d2['membrane.V', pulse], offset, 0.1)
-        APD_conductance_pulse.append(apd90)
-
-    AP_conductance.append(d2)
-    APD_conductance.append(APD_conductance_pulse)
-
-    print('done concentration: ' + str(drug_conc[i]))
+def APD_both_models(conc, repeats_SD, repeats_CS, save_AP):
+    # Load the APs if they have been saved
+    SD_filename = data_dir + 'SD_AP_' + str(conc) + '.zip'
+    CS_filename = data_dir + 'CS_AP_' + str(conc) + '.zip'
+    load_AP = save_AP and not force and os.path.isfile(SD_filename) and \
+        os.path.isfile(CS_filename)
+    if not load_AP:
+        print('simulating concentration: ' + str(conc))
+
+    # Run simulation for the AP-SD model till steady state
+    if load_AP:
+        log = myokit.DataLog.load(SD_filename)
+    else:
+        log = AP_model.drug_simulation(
+            drug, conc, repeats_SD, save_signal=save_signal,
+            log_var=['engine.time', 'membrane.V', 'ikr.IKr'],
+            abs_tol=APD_ABS_TOL, rel_tol=APD_REL_TOL)
+        if save_AP:
+            log.save(SD_filename)
+
+    # Compute APD90 of simulated AP
+    APD_trapping_pulse = AP_model.APD90_batch(
+        [log['membrane.V', pulse] for pulse in range(save_signal)],
+        offset, 0.1).tolist()
+
+    # Run simulation for the AP-CS model till steady state
+    if load_AP:
+        d2 = myokit.DataLog.load(CS_filename)
+    else:
+        reduction_scale = Hill_model.simulate(estimates[:2], conc)
+        d2 = AP_model.conductance_simulation(
+            base_conductance * reduction_scale, repeats_CS,
+            save_signal=save_signal,
+            log_var=['engine.time', 'membrane.V', 'ikr.IKr'],
+            abs_tol=APD_ABS_TOL, rel_tol=APD_REL_TOL)
+        if save_AP:
+            d2.save(CS_filename)
+
+    # Compute APD90 of simulated AP
+    APD_conductance_pulse = AP_model.APD90_batch(
+        [d2['membrane.V', pulse] for pulse in range(save_signal)],
+        offset, 0.1).tolist()
+
+    if not load_AP:
+        print('done concentration: ' + str(conc))
+
+    return APD_trapping_pulse, APD_conductance_pulse
+
+
+# APD90s of both models that have been simulated, keyed by the drug
+# concentration and the number of pulses of each model
+APD_cache = {}
+
+
+def APD_evaluation(drug_conc, repeats_SD, repeats_CS, save_AP):
+    # Only simulate the drug concentrations that have not been simulated
+    keys = [(float(conc), repeats_SD, repeats_CS) for conc in drug_conc]
+    new_conc = [conc for conc, key in zip(drug_conc, keys)
+                if key not in APD_cache]
+    if new_conc:
+        evaluator = modelling.ForkEvaluator(
+            APD_both_models, args=(repeats_SD, repeats_CS, save_AP))
+        for conc, APDs in zip(new_conc, evaluator.evaluate(new_conc)):
+            APD_cache[(float(conc), repeats_SD, repeats_CS)] = APDs
+
+    # Arrays of APD90s with shape (n_conc, save_signal)
+    APDs = [APD_cache[key] for key in keys]
+    return np.array([i[0] for i in APDs]), np.array([i[1] for i in APDs])
+
+
+APD_trapping, APD_conductance = APD_evaluation(drug_conc, repeats_SD,
+                                               repeats_CS, True)
 
 # Save simulated APD90 of both the AP-SD model and the AP-CS model
 column_name = ['pulse ' + str(i) for i in range(save_signal)]
@@ -171,56 +236,27 @@ APD_conductance_df.to_csv(data_dir + 'CS_APD_pulses' +
 
 # Define drug concentration range for steady state APD90 comparison between
 # models
+# The coarse drug concentrations within the range are included, so that
+# their APD90s are reused rather than simulated again
+coarse_conc = np.array(drug_conc)
 drug_conc = drug_conc_lib.drug_concentrations[drug]['fine']
+coarse_conc = coarse_conc[(coarse_conc >= min(drug_conc)) &
+                          (coarse_conc <= max(drug_conc))]
+drug_conc = np.unique(np.concatenate([drug_conc, coarse_conc]))
 repeats = 1000
 save_signal = 2
 
-APD_conductance = []
-APD_trapping = []
-
-for i in range(len(drug_conc)):
-    print('simulating concentration: ' + str(drug_conc[i]))
-
-    # Run simulation for the AP-SD model till steady state
-    log = AP_model.drug_simulation(
-        drug, drug_conc[i], repeats, save_signal=save_signal,
-        log_var=['engine.time', 'membrane.V', 'ikr.IKr'], abs_tol=abs_tol,
-        rel_tol=rel_tol)
-
-    # Compute APD90 of simulated AP
-    APD_trapping_pulse = []
-    for pulse in range(save_signal):
-        apd90 = AP_model.APD90(log['membrane.V', pulse], offset, 0.1)
-        APD_trapping_pulse.append(apd90)
-
-    APD_trapping.append(APD_trapping_pulse)
-
-    # Run simulation for the AP-CS model till steady state
-    reduction_scale = Hill_model.simulate(estimates[:2], drug_conc[i])
-    d2 = AP_model.conductance_simulation(
-        base_conductance * reduction_scale, repeats,
-        save_signal=save_signal,
-        log_var=['engine.time', 'membrane.V', 'ikr.IKr'], abs_tol=abs_tol,
-        rel_tol=rel_tol)
-
-    # Compute APD90 of simulated AP
-    APD_conductance_pulse = []
-    for pulse in range(save_signal):
-        apd90 = AP_model.APD90(d2['membrane.V', pulse], offset, 0.1)
-        APD_conductance_pulse.append(apd90)
-
-    APD_conductance.append(APD_conductance_pulse)
-
-    print('done concentration: ' + str(drug_conc[i]))
+APD_trapping, APD_conductance = APD_evaluation(drug_conc, repeats, repeats,
+                                               False)
 
 # Compute APD90 with AP behaviour in alternating cycles
-APD_trapping = [max(i) for i in APD_trapping]
-APD_conductance = [max(i) for i in APD_conductance]
+APD_trapping = APD_trapping.max(axis=1)
+APD_conductance = APD_conductance.max(axis=1)
 
 # Save APD90 data
-APD_trapping_df = pd.DataFrame(np.array(APD_trapping), columns=['APD'])
-APD_trapping_df['drug concentration'] = drug_conc
+APD_trapping_df = pd.DataFrame({'APD': APD_trapping,
+                                'drug concentration': drug_conc})
 APD_trapping_df.to_csv(data_dir + 'SD_APD_fine.csv')
-APD_conductance_df = pd.DataFrame(np.array(APD_conductance), columns=['APD'])
-APD_conductance_df['drug concentration'] = drug_conc
+APD_conductance_df = pd.DataFrame({'APD': APD_conductance,
+                                   'drug concentration': drug_conc})
 APD_conductance_df.to_csv(data_dir + 'CS_APD_fine.csv')
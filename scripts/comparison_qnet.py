@@ -62,6 +62,7 @@ for drug in drug_list:
     # Compute I_net and qNet for each condition
     qNet_SD_arr = []
     qNet_CS_arr = []
+    reduction_scales = Hill_model.simulate(Hill_coefs[:2], drug_conc)
     for i in range(len(drug_conc)):
         print('simulating concentration: ' + str(drug_conc[i]))
         log = AP_model.drug_simulation(
@@ -77,9 +78,8 @@ for drug in drug_list:
         qNet = np.trapz(inet, x=log.time()) * 1e-3  # pA/pF*s
         qNet_SD_arr.append(qNet)
 
-        reduction_scale = Hill_model.simulate(Hill_coefs[:2], drug_conc[i])
         d2 = AP_model.conductance_simulation(
-            base_conductance * reduction_scale, prepace + save_signal,
+            base_conductance * reduction_scales[i], prepace + save_signal,
             save_signal=save_signal, timestep=0.01,
             log_var=['engine.time', 'membrane.V'] + current_list,
             abs_tol=abs_tol, rel_tol=rel_tol, set_state=control_log)
@@ -52,11 +52,9 @@ panel2 = axs[2]
 
 # Read files name of action potential data
 SD_data_files = [f for f in os.listdir(data_dir) if
-                 f.startswith('SD_AP_') and not
-                 f.startswith('SD_AP_tran')]
+                 f.startswith('SD_AP_') and f.endswith('.zip')]
 CS_data_files = [f for f in os.listdir(data_dir) if
-                 f.startswith('CS_AP_') and not
-                 f.startswith('CS_AP_tran')]
+                 f.startswith('CS_AP_') and f.endswith('.zip')]
 conc_label_SD = [fname[6:-4] for fname in SD_data_files]
 drug_conc_SD = [float(fname[6:-4]) for fname in SD_data_files]
 conc_label_CS = [fname[6:-4] for fname in CS_data_files]
@@ -82,9 +80,9 @@ plotting_pulse_time = 1000 * 2
 trapping_AP_log = []
 conductance_AP_log = []
 for i in range(len(trapping_data_files)):
-    trapping_AP_log.append(myokit.DataLog.load_csv(
+    trapping_AP_log.append(myokit.DataLog.load(
         data_dir + trapping_data_files[i]))
-    conductance_AP_log.append(myokit.DataLog.load_csv(
+    conductance_AP_log.append(myokit.DataLog.load(
         data_dir + conductance_data_files[i]))
 
 APD_trapping = pd.read_csv(data_dir + 'SD_APD_pulses2.csv')
@@ -136,9 +134,9 @@ panel1 = axs[0]
 
 # Read files name of IKr data
 SD_data_files = [f for f in os.listdir(data_dir) if
-                 f.startswith('SD_current_')]
+                 f.startswith('SD_current_') and f.endswith('.zip')]
 CS_data_files = [f for f in os.listdir(data_dir) if
-                 f.startswith('CS_current_')]
+                 f.startswith('CS_current_') and f.endswith('.zip')]
 drug_conc_SD = [float(fname[11:-4]) for fname in SD_data_files]
 drug_conc_CS = [float(fname[11:-4]) for fname in CS_data_files]
 
@@ -153,9 +151,9 @@ conductance_data_files = [CS_data_files[i] for i in sort_ind_CS]
 trapping_hERG_log = []
 conductance_hERG_log = []
 for i in range(len(trapping_data_files)):
-    trapping_hERG_log.append(myokit.DataLog.load_csv(
+    trapping_hERG_log.append(myokit.DataLog.load(
         data_dir + trapping_data_files[i]))
-    conductance_hERG_log.append(myokit.DataLog.load_csv(
+    conductance_hERG_log.append(myokit.DataLog.load(
         data_dir + conductance_data_files[i]))
 
 hERG_trapping_plot = [e for i, e in enumerate(trapping_hERG_log)
@@ -48,9 +48,9 @@ panel2 = axs[3]
 SD_fileprefix = 'SD_current_'
 CS_fileprefix = 'CS_current_'
 SD_data_files = [f for f in os.listdir(data_dir) if
-                 f.startswith(SD_fileprefix)]
+                 f.startswith(SD_fileprefix) and f.endswith('.zip')]
 CS_data_files = [f for f in os.listdir(data_dir) if
-                 f.startswith(CS_fileprefix)]
+                 f.startswith(CS_fileprefix) and f.endswith('.zip')]
 drug_conc = [float(fname[len(SD_fileprefix):-4]) for fname in
              SD_data_files]
 drug_conc_CS = [float(fname[len(CS_fileprefix):-4]) for fname in
@@ -67,9 +67,9 @@ conductance_data_files = [CS_data_files[i] for i in sort_ind_CS]
 trapping_hERG_log = []
 conductance_hERG_log = []
 for i in range(len(trapping_data_files)):
-    trapping_hERG_log.append(myokit.DataLog.load_csv(
+    trapping_hERG_log.append(myokit.DataLog.load(
         data_dir + trapping_data_files[i]))
-    conductance_hERG_log.append(myokit.DataLog.load_csv(
+    conductance_hERG_log.append(myokit.DataLog.load(
         data_dir + conductance_data_files[i]))
 
 # Initiate constants and variables
@@ -148,8 +148,8 @@ panel5 = axs[2]
 # Load AP data
 CS_AP_prefix = 'CS_AP_'
 conductance_data_files = [f for f in os.listdir(data_dir) if
-                          f.startswith(CS_AP_prefix) and not
-                          f.startswith('CS_AP_transient')]
+                          f.startswith(CS_AP_prefix) and
+                          f.endswith('.zip')]
 drug_conc = [float(fname[len(CS_AP_prefix):-4]) for fname in
              conductance_data_files]
 
@@ -160,7 +160,7 @@ conductance_data_files = [conductance_data_files[i] for i in sort_ind]
 
 conductance_AP_log = []
 for i in range(len(conductance_data_files)):
-    conductance_AP_log.append(myokit.DataLog.load_csv(
+    conductance_AP_log.append(myokit.DataLog.load(
         data_dir + conductance_data_files[i]))
 
 # Initiate constants and variables
@@ -40,8 +40,7 @@ panel1 = axs[0]
 
 for i in range(len(protocol_name)):
     # Get protocol function
-    protocol = protocol_params.protocol_parameters[protocol_name[i]][
-        'function']
+    protocol = protocol_params.get_protocol(protocol_name[i])
     pulse_time = protocol_params.protocol_parameters[protocol_name[i]][
         'pulse_time']
     protocol_log = protocol.log_for_interval(0, pulse_time, for_drawing=True)
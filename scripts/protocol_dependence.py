@@ -27,7 +27,7 @@ protocol_params = modelling.ProtocolParameters()
 protocol_name = ['Milnes', 'Pneg80', 'P0', 'P40']
 protocols = []
 for prot in protocol_name:
-    protocols.append(protocol_params.protocol_parameters[prot]['function'])
+    protocols.append(protocol_params.get_protocol(prot))
 color = ['orange', 'blue', 'red', 'green']
 
 # Set up library of parameters
@@ -57,7 +57,7 @@ for drug in drugs:
 
         # Define the parameter values of the drug
         param_values = param_lib.binding_parameters[drug]
-        param_values = pd.DataFrame(data=param_values, index=[0])
+        param_values = pd.DataFrame(data=dict(param_values), index=[0])
         ComparisonController = modelling.ModelComparison(param_values)
 
         # Generate the Hill curve of the SD model with different protocols
@@ -101,21 +101,20 @@ for p in protocol_name:
     # Load Hill curve of given protocol
     Hill_eq = Hill_coef_df.loc[Hill_coef_df['protocol'] == p]
     Hill_eq = Hill_eq.values.tolist()[0][:-1]
+    reduction_scales = Hill_model.simulate(Hill_eq, drug_conc)
 
     # Simulate AP and calculate APD90
     for i in range(len(drug_conc)):
         print('simulating for drug concentration: ' + str(drug_conc[i]))
 
-        reduction_scale = Hill_model.simulate(Hill_eq, drug_conc[i])
         d2 = AP_model.conductance_simulation(
-            base_conductance * reduction_scale, repeats, timestep=0.01,
+            base_conductance * reduction_scales[i], repeats, timestep=0.01,
             save_signal=save_signal, abs_tol=abs_tol, rel_tol=rel_tol,
             log_var=['engine.time', 'membrane.V'])
 
-        APD_conductance_pulse = []
-        for pulse in range(save_signal):
-            apd90 = AP_model.APD90(d2['membrane.V', pulse], offset, 0.01)
-            APD_conductance_pulse.append(apd90)
+        APD_conductance_pulse = AP_model.APD90_batch(
+            [d2['membrane.V', pulse] for pulse in range(save_signal)],
+            offset, 0.01)
 
         APD_conductance.append(APD_conductance_pulse)
 
@@ -7,7 +7,6 @@ import myokit
 import numpy as np
 import os
 import pandas as pd
-import pints
 
 import modelling
 
@@ -22,7 +21,7 @@ model, _, x = myokit.load(model)
 drug_model = modelling.BindingKinetics(model)
 
 protocol_params = modelling.ProtocolParameters()
-protocol = protocol_params.protocol_parameters['Milnes']['function']
+protocol = protocol_params.get_protocol('Milnes')
 drug_model.protocol = protocol
 
 # Load AP model
@@ -100,9 +99,8 @@ def param_evaluation(param, param_values):
             MAError = float("Nan")
 
     # Create dataframe to save results
-    conc_Hill_ind = ['conc_' + str(i) for i, _ in
-                     enumerate(drug_conc_Hill)]
-    conc_AP_ind = ['conc_' + str(i) for i, _ in enumerate(drug_conc_AP)]
+    conc_Hill_ind = [f'conc_{i}' for i in range(len(drug_conc_Hill))]
+    conc_AP_ind = [f'conc_{i}' for i in range(len(drug_conc_AP))]
     index_dict = {'drug_conc_Hill': conc_Hill_ind,
                   'peak_current': conc_Hill_ind,
                   'Hill_curve': ['Hill_coef', 'IC50'],
@@ -158,7 +156,7 @@ for drug in drug_list:
     # Evaluate the RMSD and MD between APD90s of a synthetic drug with
     # changing Hill coefficient from the ORd-SD model and the ORd-CS model
     n_workers = 8
-    evaluator = pints.ParallelEvaluator(param_evaluation,
+    evaluator = modelling.ForkEvaluator(param_evaluation,
                                         n_workers=n_workers,
                                         args=[param_values])
     for i in range(int(np.ceil(len(param_fullrange) / n_workers))):
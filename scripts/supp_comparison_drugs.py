@@ -26,7 +26,7 @@ protocol_params = modelling.ProtocolParameters()
 protocol_list = protocol_params.protocols
 protocols = []
 for prot in protocol_list:
-    protocols.append(protocol_params.protocol_parameters[prot]['function'])
+    protocols.append(protocol_params.get_protocol(prot))
 
 # Define Hill equation
 Hill_model = modelling.HillsModel()
@@ -62,16 +62,16 @@ for drug in drug_list:
         current_model.protocol = protocols[p]
 
         # Simulate IKr and compute the peak current
-        peaks = []
+        peaks = np.empty(len(drug_conc))
         for i in range(len(drug_conc)):
             log = current_model.drug_simulation(drug, drug_conc[i], repeats,
                                                 abs_tol=abs_tol,
                                                 rel_tol=rel_tol)
-            peak, _ = current_model.extract_peak(log, 'ikr.IKr')
-            peaks.append(peak[-1])
+            peaks[i] = np.max(log['ikr.IKr'])
 
         # Normalise the peak currents and fit the Hill curve
-        peaks = (peaks - min(peaks)) / (max(peaks) - min(peaks))
+        peak_min, peak_max = peaks.min(), peaks.max()
+        peaks = (peaks - peak_min) / (peak_max - peak_min)
         estimates, _ = optimiser.optimise(drug_conc, peaks)
 
         Hill_df = pd.DataFrame({'Hill coefficient': [estimates[0]],
@@ -95,6 +95,7 @@ for drug in drug_list:
     offset = 50
     save_signal = 2
     drug_conc = drug_conc_lib.drug_concentrations[drug]['fine']
+    reduction_scales = Hill_model.simulate(Hill_eq, drug_conc)
 
     APD_conductance = []
     APD_trapping = []
@@ -107,25 +108,22 @@ for drug in drug_list:
             log_var=['engine.time', 'membrane.V'])
 
         # Calculate the APD90
-        APD_trapping_pulse = []
-        for pulse in range(save_signal):
-            apd90 = AP_model.APD90(log['membrane.V', pulse], offset, 0.1)
-            APD_trapping_pulse.append(apd90)
+        APD_trapping_pulse = AP_model.APD90_batch(
+            [log['membrane.V', pulse] for pulse in range(save_signal)],
+            offset, 0.1)
 
         APD_trapping.append(APD_trapping_pulse)
 
         # Simulate AP of the AP-CS model
-        reduction_scale = Hill_model.simulate(Hill_eq, conc)
         d2 = AP_model.conductance_simulation(
-            base_conductance * reduction_scale, repeats,
+            base_conductance * reduction_scales[i], repeats,
             save_signal=save_signal, abs_tol=abs_tol, rel_tol=rel_tol,
             log_var=['engine.time', 'membrane.V'])
 
         # Calculate the APD90
-        APD_conductance_pulse = []
-        for pulse in range(save_signal):
-            apd90 = AP_model.APD90(d2['membrane.V', pulse], offset, 0.1)
-            APD_conductance_pulse.append(apd90)
+        APD_conductance_pulse = AP_model.APD90_batch(
+            [d2['membrane.V', pulse] for pulse in range(save_signal)],
+            offset, 0.1)
 
         APD_conductance.append(APD_conductance_pulse)
 
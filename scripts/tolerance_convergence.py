@@ -0,0 +1,113 @@
+#
+# Check the convergence of the APD90 with the tolerances of the ODE solver,
+# to choose the tolerances of the AP simulations.
+# Output:
+# 1. APD90 of the AP-SD model and the AP-CS model at a given drug
+#    concentration for a range of relative and absolute tolerances.
+# 2. The loosest tolerances for which the APD90s are within a threshold of
+#    the APD90s at the tightest tolerance.
+#
+
+import myokit
+import numpy as np
+import os
+import pandas as pd
+import sys
+
+import modelling
+
+# Define drug and drug concentration
+# (Requires binding_kinetics_comparison.py to be run first.)
+drug = sys.argv[1]
+drug_conc = float(sys.argv[2])
+
+# Define directories to save simulated data
+data_dir = '../simulation_data/tolerance/' + drug + '/'
+if not os.path.isdir(data_dir):
+    os.makedirs(data_dir)
+
+# Set AP model
+APmodel = '../math_model/ohara-cipa-v1-2017-opt.mmt'
+APmodel = myokit.load_model(APmodel)
+AP_model = modelling.BindingKinetics(APmodel, current_head='ikr')
+
+# Define current protocol
+pulse_time = 1000
+AP_model.protocol = modelling.ProtocolLibrary().current_impulse(pulse_time)
+base_conductance = APmodel.get('ikr.gKr').value()
+
+# Scale the conductance of the AP-CS model with the Hill curve fitted in
+# binding_kinetics_comparison.py
+Hill_dir = '../simulation_data/model_comparison/' + drug + '/Milnes/'
+estimates = np.loadtxt(Hill_dir + 'Hill_curve.txt', unpack=True)
+Hill_model = modelling.HillsModel()
+reduction_scale = Hill_model.simulate(estimates[:2], drug_conc)
+
+offset = 50
+save_signal = 2
+repeats = 1000
+
+# Define tolerance values to compare, from the loosest to the tightest
+rel_tols = [1e-6, 1e-7, 1e-8, 1e-10]
+abs_tols = [1e-5, 1e-6, 1e-7, 1e-8]
+
+# Difference from the APD90 at the tightest tolerance that is accepted (ms)
+APD_diff_thres = 0.05
+
+
+def APD_both_models(abs_tol, rel_tol):
+    # Run simulation for the AP-SD model till steady state
+    log = AP_model.drug_simulation(
+        drug, drug_conc, repeats, save_signal=save_signal,
+        log_var=['engine.time', 'membrane.V'], abs_tol=abs_tol,
+        rel_tol=rel_tol)
+    APD_trapping = AP_model.APD90_batch(
+        [log['membrane.V', pulse] for pulse in range(save_signal)],
+        offset, 0.1)
+
+    # Run simulation for the AP-CS model till steady state
+    d2 = AP_model.conductance_simulation(
+        base_conductance * reduction_scale, repeats,
+        save_signal=save_signal, log_var=['engine.time', 'membrane.V'],
+        abs_tol=abs_tol, rel_tol=rel_tol)
+    APD_conductance = AP_model.APD90_batch(
+        [d2['membrane.V', pulse] for pulse in range(save_signal)],
+        offset, 0.1)
+
+    # Compute APD90 with AP behaviour in alternating cycles
+    return max(APD_trapping), max(APD_conductance)
+
+
+def loosest_tolerance(tols, APDs):
+    # Choose the loosest tolerance with APD90s within the threshold of the
+    # APD90s at the tightest tolerance
+    for tol, APD in zip(tols, APDs):
+        if all(abs(i - j) < APD_diff_thres for i, j in zip(APD, APDs[-1])):
+            return tol
+
+
+# Compare APD90s for a range of relative tolerances, with the tightest
+# absolute tolerance
+APDs_rel = []
+for rel_tol in rel_tols:
+    print('simulating relative tolerance: ' + str(rel_tol))
+    APDs_rel.append(APD_both_models(abs_tols[-1], rel_tol))
+APD_REL_TOL = loosest_tolerance(rel_tols, APDs_rel)
+
+# Compare APD90s for a range of absolute tolerances, with the chosen
+# relative tolerance
+APDs_abs = []
+for abs_tol in abs_tols:
+    print('simulating absolute tolerance: ' + str(abs_tol))
+    APDs_abs.append(APD_both_models(abs_tol, APD_REL_TOL))
+APD_ABS_TOL = loosest_tolerance(abs_tols, APDs_abs)
+
+print('APD_ABS_TOL = ' + str(APD_ABS_TOL))
+print('APD_REL_TOL = ' + str(APD_REL_TOL))
+
+# Save APD90 data
+APD_df = pd.DataFrame(
+    APDs_rel + APDs_abs, columns=['APD_trapping', 'APD_conductance'])
+APD_df['abs_tol'] = [abs_tols[-1]] * len(rel_tols) + abs_tols
+APD_df['rel_tol'] = rel_tols + [APD_REL_TOL] * len(abs_tols)
+APD_df.to_csv(data_dir + 'APD_tolerance_' + str(drug_conc) + '.csv')